@@ -9,34 +9,99 @@
 from __future__ import annotations
 
 import argparse
-import json
+import atexit
+import functools
+import os
+import queue
 import re
+import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterator
 
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.html import HtmlElement
 
 BASE_URL = "https://www.agroprecios.com/precios-subasta-tabla.php"
 TIMEOUT_SECONDS = 20
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+MAX_RETRY_AFTER_SECONDS = 60.0
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/123.0.0.0 Safari/537.36"
 )
 
+_URL_RE = re.compile(r"window\.location\s*=\s*'([^']+)'")
+_DATE_RE = re.compile(r"(\d{2})-(\d{2})-(\d{4})")
+_ERROR_RE = re.compile(r"error", re.IGNORECASE)
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XP_TITLE_DATE = etree.XPath(f"//table[{_has_class('tab_pre_sub')}]//td[{_has_class('titNombreder')}]")
+_XP_TITLE_NAME = etree.XPath(f"//table[{_has_class('tab_pre_sub')}]//td[{_has_class('titNombreizq')}]")
+_XP_ROWS = etree.XPath(f"(//table[{_has_class('tab_pre_pro')}])[1]//tr")
+_XP_FAMILY_CELL = etree.XPath(".//td[starts-with(@class, 'fam')]")
+_XP_PRODUCT_CELL = etree.XPath(f".//td[{_has_class('pro')}]")
+_XP_CUT_CELLS = etree.XPath(f".//td[{_has_class('txt')}]")
+
 
 @dataclass
 class ParsedRow:
     family_name: str
+    family_key: str
     product_name: str
+    product_key: str
     product_url: str | None
     cuts: list[int | None]
 
 
+class RateLimiter:
+    """Token bucket compartido entre hilos para no superar `rate_per_sec` peticiones/s de media."""
+
+    def __init__(self, rate_per_sec: float, burst: int = 1) -> None:
+        self.rate_per_sec = rate_per_sec
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self.updated_at
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_sec)
+                self.updated_at = now
+
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate_per_sec)
+            time.sleep(wait)
+
+    def defer(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
 class JsonStore:
     def __init__(self, data_dir: Path) -> None:
         self.data_dir = data_dir
@@ -45,40 +110,93 @@ class JsonStore:
         self.subastas_path = self.data_dir / "subastas.json"
         self.familias_path = self.data_dir / "familias.json"
         self.productos_path = self.data_dir / "productos.json"
-        self.precios_path = self.data_dir / "preciosubasta.json"
+        self.precios_path = self.data_dir / "preciosubasta.jsonl"
+
+        legacy_precios_path = self.data_dir / "preciosubasta.json"
+        if not self.precios_path.exists() and legacy_precios_path.exists():
+            self._migrate_precios(legacy_precios_path)
 
         self.subastas = self._load(self.subastas_path)
         self.familias = self._load(self.familias_path)
         self.productos = self._load(self.productos_path)
-        self.precios = self._load(self.precios_path)
 
         self.subastas_by_id = {item["id"]: item for item in self.subastas}
-        self.familias_by_name = {item["nombre"].strip().lower(): item for item in self.familias}
+        self.familias_by_name = {
+            sys.intern(item["nombre"].strip().lower()): item for item in self.familias
+        }
         self.productos_by_key = {
-            (item["familia_id"], item["nombre"].strip().lower()): item for item in self.productos
+            (item["familia_id"], sys.intern(item["nombre"].strip().lower())): item
+            for item in self.productos
         }
 
-        self.precios_keys = {
-            (
-                item["subasta_id"],
-                item["fecha"],
-                item["producto_id"],
-                item["corte"],
-            )
-            for item in self.precios
-        }
+        self.precios_keys = self._load_precios_keys(self.precios_path)
+        # Las líneas nuevas de precios las escribe un hilo aparte para no frenar el scraping con
+        # el disco. b"" en la cola pide un flush y None cierra el fichero y termina el hilo. Cada
+        # elemento se confirma con task_done(), así que queue.join() espera a que esté en disco.
+        self._precios_queue: queue.Queue[bytes | None] = queue.Queue()
+        self._precios_writer: threading.Thread | None = None
+        self._precios_writer_error: OSError | None = None
+
+        self._dirty: set[Path] = set()
+        self._last_saved = time.monotonic()
 
     @staticmethod
     def _load(path: Path) -> list[dict[str, Any]]:
         if not path.exists():
             return []
-        with path.open("r", encoding="utf-8") as file:
+        with path.open("rb") as file:
             try:
-                data = json.load(file)
-            except json.JSONDecodeError:
+                data = orjson.loads(file.read())
+            except orjson.JSONDecodeError:
                 return []
         return data if isinstance(data, list) else []
 
+    @staticmethod
+    def _iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+        if not path.exists():
+            return
+        with path.open("rb") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Línea truncada (p. ej. ejecución interrumpida): se descarta.
+                    continue
+
+    @staticmethod
+    def _precio_key(subasta_id: int, fecha_ordinal: int, producto_id: int, corte: int) -> int:
+        # Empaqueta la clave de unicidad en un único int: subasta | producto (24 bits) |
+        # fecha como ordinal (20 bits, llega hasta el año 2870) | corte (8 bits).
+        if producto_id >> 24 or corte >> 8:
+            raise ValueError(f"producto_id={producto_id} o corte={corte} fuera de rango para la clave")
+        return (subasta_id << 52) | (producto_id << 28) | (fecha_ordinal << 8) | corte
+
+    @classmethod
+    def _load_precios_keys(cls, path: Path) -> set[int]:
+        # Solo se conserva la clave empaquetada de cada precio (no el registro).
+        ordinals: dict[str, int] = {}
+        keys: set[int] = set()
+        for item in cls._iter_jsonl(path):
+            fecha_ordinal = ordinals.get(item["fecha"])
+            if fecha_ordinal is None:
+                fecha_ordinal = date.fromisoformat(item["fecha"]).toordinal()
+                ordinals[item["fecha"]] = fecha_ordinal
+            keys.add(cls._precio_key(item["subasta_id"], fecha_ordinal, item["producto_id"], item["corte"]))
+        return keys
+
+    def _migrate_precios(self, legacy_path: Path) -> None:
+        # Igual que _save_file: si la migración se interrumpe no queda un .jsonl parcial que
+        # impida reintentarla en el siguiente arranque.
+        tmp_path = self.precios_path.with_name(self.precios_path.name + ".tmp")
+        with tmp_path.open("wb") as file:
+            for record in self._load(legacy_path):
+                file.write(orjson.dumps(record) + b"\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.precios_path)
+
     @staticmethod
     def _next_id(items: list[dict[str, Any]]) -> int:
         return (max((item.get("id", 0) for item in items), default=0) + 1) if items else 1
@@ -89,75 +207,200 @@ class JsonStore:
             record = {"id": subasta_id, "nombre": nombre.strip()}
             self.subastas.append(record)
             self.subastas_by_id[subasta_id] = record
+            self._dirty.add(self.subastas_path)
             return
 
         if nombre.strip() and stored.get("nombre") != nombre.strip():
             stored["nombre"] = nombre.strip()
+            self._dirty.add(self.subastas_path)
 
-    def get_or_create_familia(self, family_name: str) -> int:
-        key = family_name.strip().lower()
-        existing = self.familias_by_name.get(key)
+    def get_or_create_familia(self, family_name: str, family_key: str) -> int:
+        existing = self.familias_by_name.get(family_key)
         if existing is not None:
             return existing["id"]
 
         family_id = self._next_id(self.familias)
-        record = {"id": family_id, "nombre": family_name.strip()}
+        record = {"id": family_id, "nombre": family_name}
         self.familias.append(record)
-        self.familias_by_name[key] = record
+        self.familias_by_name[family_key] = record
+        # Los IDs nuevos se persisten al momento: ningún precio puede llegar a disco apuntando
+        # a un ID que no esté ya guardado (y que otra ejecución podría reasignar).
+        self._save_file(self.familias_path, self.familias)
         return family_id
 
-    def get_or_create_producto(self, family_id: int, product_name: str, product_url: str | None) -> int:
-        key = (family_id, product_name.strip().lower())
+    def get_or_create_producto(
+        self,
+        family_id: int,
+        product_name: str,
+        product_key: str,
+        product_url: str | None,
+    ) -> int:
+        key = (family_id, product_key)
         existing = self.productos_by_key.get(key)
         if existing is not None:
             if product_url and not existing.get("url"):
                 existing["url"] = product_url
+                self._dirty.add(self.productos_path)
             return existing["id"]
 
         product_id = self._next_id(self.productos)
         record = {
             "id": product_id,
             "familia_id": family_id,
-            "nombre": product_name.strip(),
+            "nombre": product_name,
             "url": product_url,
         }
         self.productos.append(record)
         self.productos_by_key[key] = record
+        self._save_file(self.productos_path, self.productos)
         return product_id
 
     def insert_precio(
         self,
         subasta_id: int,
-        fecha_iso: str,
+        fecha: date,
         producto_id: int,
         corte: int,
         precio: int,
     ) -> bool:
-        key = (subasta_id, fecha_iso, producto_id, corte)
+        key = self._precio_key(subasta_id, fecha.toordinal(), producto_id, corte)
         if key in self.precios_keys:
             return False
 
         record = {
             "subasta_id": subasta_id,
-            "fecha": fecha_iso,
+            "fecha": date_to_iso(fecha),
             "producto_id": producto_id,
             "corte": corte,
             "precio": precio,
         }
-        self.precios.append(record)
+        self._append_precio(record)
         self.precios_keys.add(key)
+        self._dirty.add(self.precios_path)
         return True
 
+    def _append_precio(self, record: dict[str, Any]) -> None:
+        if self._precios_writer is None:
+            self._precios_writer = threading.Thread(
+                target=self._precios_writer_loop,
+                name="precios-writer",
+                daemon=True,
+            )
+            self._precios_writer.start()
+            # Si el proceso termina sin llegar a save() (excepción, Ctrl-C), se guardan los
+            # catálogos pendientes, se vacía la cola y se cierra el fichero antes de que el
+            # intérprete mate al hilo daemon.
+            atexit.register(self._close_at_exit)
+        self._raise_precios_writer_error()
+        self._precios_queue.put(orjson.dumps(record) + b"\n")
+
+    def _open_precios_log(self) -> BinaryIO:
+        needs_newline = False
+        if self.precios_path.exists() and self.precios_path.stat().st_size > 0:
+            with self.precios_path.open("rb") as file:
+                file.seek(-1, 2)
+                needs_newline = file.read(1) != b"\n"
+        file = self.precios_path.open("ab")
+        if needs_newline:
+            file.write(b"\n")
+        return file
+
+    def _precios_writer_loop(self) -> None:
+        file: BinaryIO | None = None
+        try:
+            while True:
+                line = self._precios_queue.get()
+                try:
+                    # Un error de disco detiene la escritura para siempre (no se reanuda dejando
+                    # un hueco en el log); la cola se sigue consumiendo para que queue.join() no
+                    # se bloquee y el error se relanza en el hilo principal.
+                    if self._precios_writer_error is None and line is not None:
+                        if file is None:
+                            file = self._open_precios_log()
+                        if line:
+                            file.write(line)
+                        else:
+                            file.flush()
+                except OSError as exc:
+                    self._precios_writer_error = exc
+                finally:
+                    self._precios_queue.task_done()
+                if line is None:
+                    return
+        finally:
+            if file is not None:
+                try:
+                    file.close()
+                except OSError as exc:
+                    if self._precios_writer_error is None:
+                        self._precios_writer_error = exc
+
+    def _raise_precios_writer_error(self) -> None:
+        if self._precios_writer_error is not None:
+            raise self._precios_writer_error
+
+    def _flush_precios(self) -> None:
+        if self._precios_writer is None:
+            return
+        self._precios_queue.put(b"")
+        self._precios_queue.join()
+        self._raise_precios_writer_error()
+
+    def _stop_precios_writer(self) -> None:
+        if self._precios_writer is None:
+            return
+        atexit.unregister(self._close_at_exit)
+        self._precios_queue.put(None)
+        self._precios_writer.join()
+        self._precios_writer = None
+        self._raise_precios_writer_error()
+
+    def _tables(self) -> dict[Path, list[dict[str, Any]]]:
+        return {
+            self.subastas_path: self.subastas,
+            self.familias_path: self.familias,
+            self.productos_path: self.productos,
+        }
+
+    def _save_dirty_tables(self) -> None:
+        tables = self._tables()
+        for path in self._dirty:
+            if path in tables:
+                self._save_file(path, tables[path])
+
+    def _close_at_exit(self) -> None:
+        # Catálogos primero: así ningún precio de la cola queda en disco sin sus referencias.
+        self._save_dirty_tables()
+        self._stop_precios_writer()
+
+    def save_dirty(self, throttle_seconds: float = 30) -> None:
+        if not self._dirty or time.monotonic() - self._last_saved < throttle_seconds:
+            return
+
+        self._save_dirty_tables()
+        self._flush_precios()
+
+        self._dirty.clear()
+        self._last_saved = time.monotonic()
+
     def save(self) -> None:
-        self._save_file(self.subastas_path, self.subastas)
-        self._save_file(self.familias_path, self.familias)
-        self._save_file(self.productos_path, self.productos)
-        self._save_file(self.precios_path, self.precios)
+        for path, data in self._tables().items():
+            self._save_file(path, data)
+        self._stop_precios_writer()
+
+        self._dirty.clear()
+        self._last_saved = time.monotonic()
 
     @staticmethod
     def _save_file(path: Path, data: list[dict[str, Any]]) -> None:
-        with path.open("w", encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=2)
+        # Se escribe en un temporal y se sustituye de forma atómica: si el proceso muere a mitad
+        # de escritura el fichero anterior queda intacto, en lugar de truncado.
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as file:
+            file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
 
 
 def parse_args() -> argparse.Namespace:
@@ -180,6 +423,18 @@ def parse_args() -> argparse.Namespace:
         default=10,
         help="IDs de subasta a consultar desde 1 hasta maxsubastas (por defecto 10)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Número máximo de consultas HTTP simultáneas (por defecto 4)",
+    )
+    parser.add_argument(
+        "--maxrate",
+        type=float,
+        default=1.0,
+        help="Peticiones por segundo como máximo, de media, contra el servidor (por defecto 1)",
+    )
     return parser.parse_args()
 
 
@@ -189,21 +444,27 @@ def parse_input_date(date_str: str | None) -> date:
     return datetime.strptime(date_str, "%d/%m/%Y").date()
 
 
+@functools.lru_cache(maxsize=None)
 def date_to_php_format(value: date) -> str:
     return value.strftime("%d/%m/%Y")
 
 
+@functools.lru_cache(maxsize=None)
 def date_to_iso(value: date) -> str:
     return value.strftime("%Y-%m-%d")
 
 
-def extract_table_date(soup: BeautifulSoup, fallback: date) -> date:
-    title_cell = soup.select_one("table.tab_pre_sub td.titNombreder")
-    if not title_cell:
+def element_text(element: HtmlElement, separator: str = " ") -> str:
+    return separator.join(text.strip() for text in element.itertext() if text.strip())
+
+
+def extract_table_date(tree: HtmlElement, fallback: date) -> date:
+    title_cells = _XP_TITLE_DATE(tree)
+    if not title_cells:
         return fallback
 
-    text = title_cell.get_text(" ", strip=True)
-    match = re.search(r"(\d{2})-(\d{2})-(\d{4})", text)
+    text = element_text(title_cells[0])
+    match = _DATE_RE.search(text)
     if not match:
         return fallback
 
@@ -211,68 +472,81 @@ def extract_table_date(soup: BeautifulSoup, fallback: date) -> date:
     return date(int(year), int(month), int(day))
 
 
-def extract_auction_name(soup: BeautifulSoup, fallback_id: int) -> str:
-    title_cell = soup.select_one("table.tab_pre_sub td.titNombreizq")
-    if not title_cell:
+def extract_auction_name(tree: HtmlElement, fallback_id: int) -> str:
+    title_cells = _XP_TITLE_NAME(tree)
+    if not title_cells:
         return f"Subasta {fallback_id}"
 
-    name = title_cell.get_text(" ", strip=True)
+    name = element_text(title_cells[0])
     if not name:
         return f"Subasta {fallback_id}"
     return name
 
 
-def parse_product_url(row: Any) -> str | None:
+def parse_product_url(row: HtmlElement) -> str | None:
     onclick = row.get("onclick", "")
     if not onclick:
         return None
 
-    match = re.search(r"window\.location\s*=\s*'([^']+)'", onclick)
+    match = _URL_RE.search(onclick)
     if match:
         return match.group(1)
     return None
 
 
-def parse_cuts(row: Any) -> list[int | None]:
+def parse_cut_value(text: str) -> int | None:
+    # Acumula los dígitos ASCII en una sola pasada, ignorando separadores de miles y
+    # símbolos, sin crear cadenas intermedias.
+    value = 0
+    seen_digit = False
+    for char in text:
+        if "0" <= char <= "9":
+            value = value * 10 + ord(char) - 48
+            seen_digit = True
+    return value if seen_digit else None
+
+
+def parse_cuts(row: HtmlElement) -> list[int | None]:
     values: list[int | None] = []
-    for cell in row.select("td.txt"):
-        text = cell.get_text(strip=True)
+    for cell in _XP_CUT_CELLS(row):
+        text = element_text(cell, separator="")
         if text == "-" or text == "":
             values.append(None)
             continue
 
-        cleaned = re.sub(r"[^0-9]", "", text)
-        values.append(int(cleaned) if cleaned else None)
+        values.append(parse_cut_value(text))
     return values
 
 
-def parse_rows(soup: BeautifulSoup) -> list[ParsedRow]:
-    table = soup.select_one("table.tab_pre_pro")
-    if table is None:
-        return []
+def parse_rows(tree: HtmlElement) -> list[ParsedRow]:
+    table_rows = _XP_ROWS(tree)
 
     rows: list[ParsedRow] = []
     current_family = ""
+    current_family_key = ""
 
-    for row in table.select("tr"):
-        classes = row.get("class", [])
+    for row in table_rows:
+        classes = row.get("class", "").split()
         if "familias_subasta" in classes:
-            fam_cell = row.select_one("td[class^='fam']")
-            if fam_cell:
-                current_family = fam_cell.get_text(" ", strip=True)
+            fam_cells = _XP_FAMILY_CELL(row)
+            if fam_cells:
+                current_family = element_text(fam_cells[0])
+                current_family_key = sys.intern(current_family.lower())
             continue
 
-        product_cell = row.select_one("td.pro")
-        if product_cell is None or not current_family:
+        product_cells = _XP_PRODUCT_CELL(row)
+        if not product_cells or not current_family:
             continue
 
-        product_name = product_cell.get_text(" ", strip=True)
+        product_name = element_text(product_cells[0])
         product_url = parse_product_url(row)
         cuts = parse_cuts(row)
         rows.append(
             ParsedRow(
                 family_name=current_family,
+                family_key=current_family_key,
                 product_name=product_name,
+                product_key=sys.intern(product_name.lower()),
                 product_url=product_url,
                 cuts=cuts,
             )
@@ -282,8 +556,8 @@ def parse_rows(soup: BeautifulSoup) -> list[ParsedRow]:
 
 
 def has_error_response(html: str) -> bool:
-    upper = html.upper()
-    return "ERROR" in upper and "tab_pre_pro" not in html
+    # Las respuestas válidas contienen la tabla: se descartan sin buscar "error" ni copiar el HTML.
+    return "tab_pre_pro" not in html and _ERROR_RE.search(html) is not None
 
 
 def fetch_auction_html(session: requests.Session, subasta_id: int, for_date: date) -> str:
@@ -298,32 +572,115 @@ def fetch_auction_html(session: requests.Session, subasta_id: int, for_date: dat
     return response.text
 
 
-def build_session() -> requests.Session:
+def is_retryable(exc: requests.RequestException) -> bool:
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_after_seconds(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def fetch_with_backoff(
+    session: requests.Session,
+    limiter: RateLimiter,
+    subasta_id: int,
+    for_date: date,
+) -> str:
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return fetch_auction_html(session, subasta_id, for_date)
+        except requests.RequestException as exc:
+            if attempt >= MAX_RETRIES or not is_retryable(exc):
+                raise
+            if isinstance(exc, requests.HTTPError) and exc.response is not None:
+                delay = retry_after_seconds(exc.response)
+                if delay is not None:
+                    # Una espera mayor bloquearía a todos los workers (y a Ctrl-C): se da la
+                    # consulta por fallida en lugar de congelar el pool.
+                    if delay > MAX_RETRY_AFTER_SECONDS:
+                        raise
+                    limiter.defer(delay)
+        time.sleep(BACKOFF_SECONDS * 2**attempt)
+        attempt += 1
+
+
+def build_session(pool_size: int = 1) -> requests.Session:
     session = requests.Session()
     session.headers.update(
         {
             "User-Agent": USER_AGENT,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+            # `br` requiere el paquete `brotli` (en requirements.txt) para que urllib3 lo descomprima.
+            "Accept-Encoding": "gzip, deflate, br",
             "Referer": "https://www.agroprecios.com/",
+            "Connection": "keep-alive",
         }
     )
+
+    # Un único host: un pool con una conexión persistente por worker. Los reintentos no se
+    # delegan en urllib3 para que también pasen por el RateLimiter (ver fetch_with_backoff).
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     return session
 
 
-def run_scrapper(lastdate: date, maxdays: int, maxsubastas: int, store: JsonStore) -> None:
-    session = build_session()
+def run_scrapper(
+    lastdate: date,
+    maxdays: int,
+    maxsubastas: int,
+    store: JsonStore,
+    workers: int = 4,
+    maxrate: float = 1.0,
+) -> None:
+    session = build_session(pool_size=workers)
+    limiter = RateLimiter(maxrate)
 
     inserted_prices = 0
     queried = 0
 
-    for day_offset in range(maxdays):
-        current_day = lastdate - timedelta(days=day_offset)
-        for subasta_id in range(1, maxsubastas + 1):
+    # Las descargas se solapan en hilos; el parseo y el JsonStore se quedan en este hilo,
+    # procesando las respuestas en el mismo orden (fecha, subasta) que antes. Solo hay una
+    # ventana acotada de descargas en vuelo, así que cada HTML se libera al procesarlo y un
+    # fallo o Ctrl-C no espera a que se descargue el resto del rango.
+    pending = (
+        (subasta_id, lastdate - timedelta(days=day_offset))
+        for day_offset in range(maxdays)
+        for subasta_id in range(1, maxsubastas + 1)
+    )
+    in_flight: deque[tuple[int, date, Future[str]]] = deque()
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            for subasta_id, current_day in islice(pending, 2 * workers - len(in_flight)):
+                future = executor.submit(fetch_with_backoff, session, limiter, subasta_id, current_day)
+                in_flight.append((subasta_id, current_day, future))
+            if not in_flight:
+                break
+
+            subasta_id, current_day, future = in_flight.popleft()
             queried += 1
             try:
-                time.sleep(1)
-                html = fetch_auction_html(session, subasta_id, current_day)
+                html = future.result()
             except requests.RequestException as exc:
                 print(
                     f"[WARN] Fallo consulta subasta={subasta_id} fecha={date_to_php_format(current_day)}: {exc}"
@@ -336,11 +693,18 @@ def run_scrapper(lastdate: date, maxdays: int, maxsubastas: int, store: JsonStor
                 )
                 continue
 
-            soup = BeautifulSoup(html, "html.parser")
-            auction_name = extract_auction_name(soup, subasta_id)
-            displayed_date = extract_table_date(soup, current_day)
+            try:
+                tree = lxml_html.fromstring(html)
+            except (etree.ParserError, ValueError) as exc:
+                print(
+                    f"[INFO] HTML no interpretable para subasta={subasta_id} en {date_to_php_format(current_day)}: {exc}"
+                )
+                continue
+
+            auction_name = extract_auction_name(tree, subasta_id)
+            displayed_date = extract_table_date(tree, current_day)
             displayed_date_iso = date_to_iso(displayed_date)
-            parsed_rows = parse_rows(soup)
+            parsed_rows = parse_rows(tree)
 
             if not parsed_rows:
                 print(
@@ -351,10 +715,11 @@ def run_scrapper(lastdate: date, maxdays: int, maxsubastas: int, store: JsonStor
             store.upsert_subasta(subasta_id, auction_name)
 
             for row in parsed_rows:
-                family_id = store.get_or_create_familia(row.family_name)
+                family_id = store.get_or_create_familia(row.family_name, row.family_key)
                 product_id = store.get_or_create_producto(
                     family_id,
                     row.product_name,
+                    row.product_key,
                     row.product_url,
                 )
 
@@ -363,7 +728,7 @@ def run_scrapper(lastdate: date, maxdays: int, maxsubastas: int, store: JsonStor
                         continue
                     was_inserted = store.insert_precio(
                         subasta_id=subasta_id,
-                        fecha_iso=displayed_date_iso,
+                        fecha=displayed_date,
                         producto_id=product_id,
                         corte=cut_index,
                         precio=price,
@@ -371,6 +736,10 @@ def run_scrapper(lastdate: date, maxdays: int, maxsubastas: int, store: JsonStor
                     if was_inserted:
                         inserted_prices += 1
 
+            store.save_dirty()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
     store.save()
     print(
         f"[OK] Consultas ejecutadas: {queried}. Nuevos precios insertados: {inserted_prices}. "
@@ -378,11 +747,15 @@ def run_scrapper(lastdate: date, maxdays: int, maxsubastas: int, store: JsonStor
     )
 
 
-def validate_limits(maxdays: int, maxsubastas: int) -> None:
+def validate_limits(maxdays: int, maxsubastas: int, workers: int, maxrate: float) -> None:
     if maxdays < 1:
         raise ValueError("maxdays debe ser >= 1")
     if maxsubastas < 1:
         raise ValueError("maxsubastas debe ser >= 1")
+    if workers < 1:
+        raise ValueError("workers debe ser >= 1")
+    if maxrate <= 0:
+        raise ValueError("maxrate debe ser > 0")
 
 
 def main() -> None:
@@ -394,7 +767,7 @@ def main() -> None:
         raise SystemExit(f"Formato de fecha inválido en --lastdate. Usa dd/mm/yyyy. Detalle: {exc}")
 
     try:
-        validate_limits(args.maxdays, args.maxsubastas)
+        validate_limits(args.maxdays, args.maxsubastas, args.workers, args.maxrate)
     except ValueError as exc:
         raise SystemExit(str(exc))
 
@@ -402,7 +775,14 @@ def main() -> None:
     data_dir = base_dir / "data"
     store = JsonStore(data_dir)
 
-    run_scrapper(lastdate=lastdate, maxdays=args.maxdays, maxsubastas=args.maxsubastas, store=store)
+    run_scrapper(
+        lastdate=lastdate,
+        maxdays=args.maxdays,
+        maxsubastas=args.maxsubastas,
+        store=store,
+        workers=args.workers,
+        maxrate=args.maxrate,
+    )
 
 
 if __name__ == "__main__":